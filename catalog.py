@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""
+This script builds a catalog of the OBS projects and Git organizations
+that are handled by the promotion scripts.
+
+The catalog is an in-memory index of:
+
+- OBS projects -> subprojects -> packages (with link information)
+- Git servers -> organizations -> repositories (with archived information)
+
+Excluded subprojects, packages and repositories are flagged in the catalog.
+It can be saved as JSON so all scripts (and pipeline stages) are using
+the same snapshot instead of querying OBS and Gitea again.
+"""
+
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Dict, List
+
+import scmutils
+import tracing
+
+API_DEFAULT = "https://api.opensuse.org"
+CATALOG_VERSION = 1
+
+
+def new_catalog() -> Dict:
+    return {"version": CATALOG_VERSION, "created": int(time.time()), "obs": {}, "git": {}}
+
+
+def search_subprojects(client, projects: List[str]) -> Dict[str, List[str]]:
+    """
+    Get the subprojects for all the given projects with a single OBS search
+    """
+    if not projects:
+        return {}
+    query = " or ".join(f"starts-with(@name,'{prj}:')" for prj in projects)
+    with tracing.span("osctiny", "search:project", projects=",".join(projects)):
+        root = client.search.project(query)
+    names = [p.attrib["name"] for p in root.findall("project")]
+    return {prj: sorted(n for n in names if n.startswith(prj + ":")) for prj in projects}
+
+
+def list_packages(client, project: str) -> Dict[str, Dict]:
+    """
+    Get the packages of a project and whether they are linked to other package
+    """
+    from osctiny.extensions.packages import Package
+
+    pkg_handler = Package(client)
+    packages = {}
+    with tracing.span("osctiny", "packages:get_list", project=project):
+        packages_list = pkg_handler.get_list(project=project)
+    for package in packages_list.iter():
+        name = package.attrib.get("name")
+        if name is None:
+            continue
+        with tracing.span("package", "index", project=project, package=name):
+            with tracing.span("osctiny", "packages:get_files", project=project, package=name):
+                pkg_files = pkg_handler.get_files(project, name)
+            packages[name] = {"link": pkg_files.find("linkinfo") is not None}
+    return packages
+
+
+def add_obs_projects(
+    catalog: Dict,
+    client,
+    projects: List[str],
+    with_packages: bool = True,
+    exclude_subprojects: List[str] = None,
+    exclude_packages: List[str] = None,
+):
+    """
+    Index the given projects, their subprojects and (optionally) their packages
+    """
+    if exclude_subprojects is None:
+        exclude_subprojects = []
+    if exclude_packages is None:
+        exclude_packages = []
+
+    obs = catalog["obs"].setdefault(client.url, {})
+    for prj, subprojects in search_subprojects(client, projects).items():
+        names = [prj] + subprojects
+        for name in names:
+            # Only the direct children are stored as subprojects
+            children = [
+                n for n in names
+                if n.startswith(name + ":") and ":" not in n[len(name) + 1 :]
+            ]
+            # Projects can be found by several searches with overlapping
+            # prefixes, so entries already indexed are merged, not replaced
+            entry = obs.setdefault(
+                name, {"subprojects": [], "excluded": False, "packages": None}
+            )
+            entry["subprojects"] = sorted(set(entry["subprojects"]) | set(children))
+            entry["excluded"] = entry["excluded"] or name in exclude_subprojects
+            if with_packages and entry["packages"] is None:
+                entry["packages"] = list_packages(client, name)
+            for pkg, pkg_entry in (entry["packages"] or {}).items():
+                pkg_entry["excluded"] = pkg_entry.get("excluded", False) or (
+                    pkg in exclude_packages
+                )
+
+
+def add_git_org(
+    catalog: Dict, git_server: str, org: str, exclude: List[str] = None
+):
+    """
+    Index the repositories of a Git organization
+    """
+    if exclude is None:
+        exclude = scmutils.REPOS_TO_EXCLUDE
+    repos = catalog["git"].setdefault(git_server, {}).setdefault(org, {})
+    for repo in scmutils.fetch_repos_json(git_server, org):
+        repos[repo["name"]] = {
+            "archived": repo["archived"],
+            "excluded": repo["name"] in exclude,
+        }
+
+
+def save_catalog(catalog: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(catalog, f, indent=1, sort_keys=True)
+
+
+def load_catalog(path: str) -> Dict:
+    with open(path) as f:
+        catalog = json.load(f)
+    if catalog.get("version") != CATALOG_VERSION:
+        raise Exception(f"ERROR unsupported catalog version in {path}")
+    return catalog
+
+
+def get_project(catalog: Dict, apiurl: str, project: str) -> Dict:
+    try:
+        return catalog["obs"][apiurl][project]
+    except KeyError:
+        raise Exception(f"ERROR project '{project}' is not in the catalog")
+
+
+def get_subprojects(catalog: Dict, apiurl: str, project: str) -> List[str]:
+    """
+    Returns all the subprojects (at any depth) of a project that are not excluded
+    """
+    obs = catalog["obs"].get(apiurl, {})
+    subprojects = []
+    pending = list(get_project(catalog, apiurl, project)["subprojects"])
+    while pending:
+        name = pending.pop(0)
+        entry = obs.get(name, {})
+        pending.extend(entry.get("subprojects", []))
+        if not entry.get("excluded", False):
+            subprojects.append(name)
+    return sorted(subprojects)
+
+
+def get_packages(catalog: Dict, apiurl: str, project: str) -> List[str]:
+    """
+    Returns the packages of a project that are neither linked nor excluded
+    """
+    packages = get_project(catalog, apiurl, project)["packages"]
+    if packages is None:
+        raise Exception(f"ERROR packages of '{project}' are not in the catalog")
+    return [
+        name
+        for name, pkg in sorted(packages.items())
+        if not pkg["link"] and not pkg["excluded"]
+    ]
+
+
+def get_repo_list(
+    git_server: str, org: str, catalog_file: str = None
+) -> List[str]:
+    """
+    Returns the list of repository names to process, either from the catalog
+    file (if given) or from the Git server.
+    """
+    if not catalog_file:
+        return scmutils.get_repo_list(
+            git_server=git_server, org=org, exclude=scmutils.REPOS_TO_EXCLUDE
+        )
+    try:
+        repos = load_catalog(catalog_file)["git"][git_server][org]
+    except KeyError:
+        raise Exception(f"ERROR '{git_server}/{org}' is not in the catalog")
+    return [
+        name
+        for name, repo in sorted(repos.items())
+        if not repo["excluded"] and not repo["archived"]
+    ]
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-o", "--output", dest="output", required=True, metavar="FILE",
+        help="Catalog file to write",
+    )
+    parser.add_argument(
+        "-A", "--apiurl", dest="url", default=API_DEFAULT,
+        help=f"URL to Build Service API. (Default: {API_DEFAULT})",
+    )
+    parser.add_argument(
+        "-p", "--project", dest="projects", action="append", default=[],
+        help="OBS project to index with its subprojects and packages",
+    )
+    parser.add_argument(
+        "--shallow-project", dest="shallow_projects", action="append", default=[],
+        help="OBS project to index with its subprojects, without packages",
+    )
+    parser.add_argument(
+        "-g", "--git-org", dest="git_orgs", action="append", default=[],
+        metavar="SERVER/ORG", help="Git organization to index, e.g. src.opensuse.org/saltbundle",
+    )
+    parser.add_argument(
+        "--exclude", dest="exclude_packages", action="append", metavar="PACKAGE_TO_EXCLUDE"
+    )
+    parser.add_argument(
+        "--exclude-subproject", dest="exclude_subproject", action="append", metavar="SUBPROJECT_TO_EXCLUDE"
+    )
+    args = parser.parse_args()
+
+    catalog = new_catalog()
+
+    if args.projects or args.shallow_projects:
+        from osctiny import Osc
+
+        osc = Osc(url=args.url)
+        add_obs_projects(
+            catalog, osc, args.projects,
+            exclude_subprojects=args.exclude_subproject,
+            exclude_packages=args.exclude_packages,
+        )
+        add_obs_projects(
+            catalog, osc, args.shallow_projects, with_packages=False,
+            exclude_subprojects=args.exclude_subproject,
+        )
+
+    for git_org in args.git_orgs:
+        git_server, org = git_org.split("/", 1)
+        add_git_org(catalog, git_server, org)
+
+    save_catalog(catalog, args.output)
+    print(f"Catalog written to '{args.output}'", flush=True)
+
+
+if __name__ == "__main__":
+    with tracing.span("run", "catalog", argv=" ".join(sys.argv[1:])):
+        main()
@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+"""
+This script performs the pre-flight checks that are required before
+promoting the Salt packages.
+
+All checks are executed concurrently, and the HTTP requests share a pool
+of connections:
+
+- "branches": the MU branches exist at https://github.com/openSUSE/salt
+  and https://github.com/openSUSE/salt-packaging. Only the git ref is
+  looked up with "git ls-remote", so no tarball is generated and neither
+  a token nor the rate-limited GitHub API is needed.
+- "services": the "_service" files of the "salt" package in the testing
+  projects are not set to the MU branches, and the Debian source tarball
+  is named "salt_<version>.orig.tar.gz".
+
+A pass/fail report is printed at the end. The script exits with status 1
+if any of the checks did not pass, and with status 2 if any of the checks
+could not be completed (e.g. a network or API error), so a failed lookup
+is never mistaken for an absent branch.
+"""
+
+import contextvars
+import json
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from traceback import format_exc
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+import scmutils
+import tracing
+
+if TYPE_CHECKING:
+    import requests
+
+GITHUB_URL = "https://github.com"
+OBS_WEB = "https://build.opensuse.org"
+
+SALT_REPO = "openSUSE/salt"
+SALT_PACKAGING_REPO = "openSUSE/salt-packaging"
+
+PRODUCTS_TESTING = "systemsmanagement:saltstack:products:testing"
+PRODUCTS_TESTING_DEBIAN = "systemsmanagement:saltstack:products:testing:debian"
+
+CHECK_GROUPS = ["branches", "services"]
+
+MAX_WORKERS = 8
+TIMEOUT = 30
+
+EXIT_FAILED = 1
+EXIT_ERROR = 2
+
+
+def get_session(max_workers: int = MAX_WORKERS) -> "requests.Session":
+    """
+    Create a requests session whose connection pool can serve all workers
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    return session
+
+
+def branch_exists(repo: str, branch: str) -> bool:
+    """
+    Check whether a branch exists in a GitHub repository using "git ls-remote"
+    """
+    ret = scmutils.run_git(
+        f"ls-remote --exit-code --heads {GITHUB_URL}/{repo} refs/heads/{branch}",
+        check=False,
+    )
+    # "--exit-code" makes git exit with 2 when no matching ref is found
+    if ret.returncode == 2:
+        return False
+    if ret.returncode != 0:
+        raise Exception(f"git ls-remote failed for {repo}: {ret.stderr.strip()}")
+    return True
+
+
+def get_service_file(
+    session: "requests.Session", project: str, package: str, expand: bool
+) -> str:
+    """
+    Get the content of the "_service" file of a package at OBS
+    """
+    with tracing.span("http", "obs:_service", project=project, package=package):
+        ret = session.get(
+            f"{OBS_WEB}/projects/{project}/packages/{package}/files/_service",
+            params={"expand": int(expand)},
+            timeout=TIMEOUT,
+        )
+    ret.raise_for_status()
+    return ret.text
+
+
+def check_branch(
+    session: "requests.Session", repo: str, branch: str
+) -> Tuple[bool, str]:
+    if branch_exists(repo, branch):
+        return True, f"'{branch}' is present at {repo}"
+    return False, f"'{branch}' is absent at {repo}"
+
+
+def check_service_not_set_to(
+    session: "requests.Session", project: str, text: str
+) -> Tuple[bool, str]:
+    service = get_service_file(session, project, "salt", expand=True)
+    if text in service:
+        return False, f"'_service' at '{project}' is set to '{text}'"
+    return True, f"'_service' at '{project}' is not set to '{text}'"
+
+
+def check_service_contains(
+    session: "requests.Session", project: str, text: str
+) -> Tuple[bool, str]:
+    service = get_service_file(session, project, "salt", expand=False)
+    if text in service:
+        return True, f"'_service' at '{project}' refers to '{text}'"
+    return False, f"'_service' at '{project}' does not refer to '{text}'"
+
+
+def get_checks(
+    mu_version: str,
+    salt_version: str = None,
+    groups: List[str] = None,
+) -> Dict[str, Tuple[Callable, tuple]]:
+    """
+    Returns the checks to run as {name: (function, extra_args)}
+    """
+    if not groups:
+        groups = CHECK_GROUPS
+    checks = {}
+    if "branches" in groups:
+        checks["salt-mu-branch"] = (
+            check_branch,
+            (SALT_REPO, f"openSUSE/MU/{mu_version}"),
+        )
+        checks["salt-packaging-mu-branch"] = (
+            check_branch,
+            (SALT_PACKAGING_REPO, f"MU/{mu_version}"),
+        )
+    if "services" in groups:
+        checks["testing-service"] = (
+            check_service_not_set_to,
+            (PRODUCTS_TESTING, f"MU/{mu_version}"),
+        )
+        checks["testing-debian-service"] = (
+            check_service_not_set_to,
+            (PRODUCTS_TESTING_DEBIAN, f"MU/{mu_version}"),
+        )
+        if salt_version:
+            checks["testing-debian-orig-tarball"] = (
+                check_service_contains,
+                (PRODUCTS_TESTING_DEBIAN, f"salt_{salt_version}.orig.tar.gz"),
+            )
+    return checks
+
+
+def run_checks(
+    checks: Dict[str, Tuple[Callable, tuple]], max_workers: int = MAX_WORKERS
+) -> List[Dict]:
+    """
+    Run the checks concurrently and return a report entry for each of them
+    """
+
+    def _run(session, func, args):
+        try:
+            return func(session, *args) + (False,)
+        except Exception as exc:
+            return False, f"ERROR: {exc}", True
+
+    report = []
+    with get_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Run each check in a copy of the current context to keep spans nested
+            futures = {
+                name: executor.submit(
+                    contextvars.copy_context().run, _run, session, func, args
+                )
+                for name, (func, args) in checks.items()
+            }
+            for name, future in futures.items():
+                passed, detail, error = future.result()
+                report.append(
+                    {"check": name, "passed": passed, "error": error, "detail": detail}
+                )
+    return report
+
+
+def print_report(report: List[Dict]):
+    print("----------------------------------------------------------------")
+    for entry in report:
+        if entry["error"]:
+            status = "ERROR"
+        else:
+            status = "PASS" if entry["passed"] else "FAIL"
+        print(f" [{status}] {entry['check']}: {entry['detail']}")
+    print("----------------------------------------------------------------")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--mu-version", dest="mu_version", required=True,
+        help="SUSE Manager maintenance update version, e.g. 4.3.7",
+    )
+    parser.add_argument(
+        "--salt-version", dest="salt_version",
+        help="Salt version to check the Debian source tarball name against",
+    )
+    parser.add_argument(
+        "--check", dest="groups", action="append", choices=CHECK_GROUPS,
+        help="Group of checks to run. Can be repeated. (Default: all)",
+    )
+    parser.add_argument(
+        "--report", dest="report_file", metavar="FILE",
+        help="Write the report as JSON to FILE",
+    )
+    args = parser.parse_args()
+
+    # Any unexpected error must not be mistaken for a failed check
+    try:
+        report = run_checks(get_checks(args.mu_version, args.salt_version, args.groups))
+        print_report(report)
+
+        if args.report_file:
+            with open(args.report_file, "w") as f:
+                json.dump(report, f, indent=2)
+    except Exception:
+        print(format_exc(), flush=True)
+        sys.exit(EXIT_ERROR)
+
+    if any(entry["error"] for entry in report):
+        sys.exit(EXIT_ERROR)
+    if not all(entry["passed"] for entry in report):
+        sys.exit(EXIT_FAILED)
+
+
+if __name__ == "__main__":
+    with tracing.span("run", "preflight", argv=" ".join(sys.argv[1:])):
+        main()
@@ -15,17 +15,15 @@ from argparse import ArgumentParser
 from difflib import unified_diff
 from traceback import format_exc
 from subprocess import run, CalledProcessError, PIPE
-from lxml import etree
-from osctiny import Osc
-from osctiny.extensions.packages import Package
-from osctiny.extensions.projects import Project
+
+import catalog
+import tracing
 
 
 API_DEFAULT = "https://api.opensuse.org"
 
 
-def copy_packages(client, src, dst, subproject=None, exclude_packages=None):
-    pkg_handler = Package(client)
+def copy_packages(client, src, dst, subproject=None, exclude_packages=None, index=None):
     if subproject is not None:
         src = src + ":" + subproject
         dst = dst + ":" + subproject
@@ -33,67 +31,94 @@ def copy_packages(client, src, dst, subproject=None, exclude_packages=None):
     if exclude_packages is None:
         exclude_packages = []
 
-    packages_list = pkg_handler.get_list(project=src)
+    if index is not None:
+        packages_list = catalog.get_packages(index, client.url, src)
+    else:
+        packages_list = get_packages(client, src)
+
+    for package_name in packages_list:
+        if package_name not in exclude_packages:
+            with tracing.span("package", "copy", project=src, package=package_name):
+                # Only copypac the packages that are not linked to other package.
+                # Packages with no link should be the ones that we mainain.
+                # The catalog only lists packages with no link.
+                if index is None and has_link(client, src, package_name):
+                    continue
+                try:
+                    result = get_diff(src, dst, package_name)
+                    print(
+                        "###################################################################",
+                        flush=True,
+                    )
+                    print(f"Diff for '{package_name}' package from '{src}' to '{dst}':\n {result}", flush=True)
+                    print(
+                        "###################################################################",
+                        flush=True,
+                    )
+                    if result != "":
+                        print(f"Copying '{package_name}' from '{src}' to '{dst}'\n", flush=True)
+                        with tracing.span("osc", "copypac"):
+                            run(["osc", "copypac", src, package_name, dst], check=True)
+                except CalledProcessError:
+                    print(f"Could not copypac '{package_name}'\n", flush=True)
+                    print(format_exc(), flush=True)
+                    sys.exit(1)
+
+
+def get_packages(client, project):
+    from osctiny.extensions.packages import Package
+
+    pkg_handler = Package(client)
+    with tracing.span("osctiny", "packages:get_list", project=project):
+        packages_list = pkg_handler.get_list(project=project)
     for package in packages_list.iter():
         package_name = package.attrib.get("name")
-        # Only copypac the packages that are not linked to other package.
-        # Packages with no link should be the ones that we mainain.
-        if (
-            package_name is not None
-            and package_name not in exclude_packages
-            and not has_link(client, src, package_name)
-        ):
-            try:
-                result = get_diff(src, dst, package_name)
-                print(
-                    "###################################################################",
-                    flush=True,
-                )
-                print(f"Diff for '{package_name}' package from '{src}' to '{dst}':\n {result}", flush=True)
-                print(
-                    "###################################################################",
-                    flush=True,
-                )
-                if result != "":
-                    print(f"Copying '{package_name}' from '{src}' to '{dst}'\n", flush=True)
-                    run(["osc", "copypac", src, package_name, dst], check=True)
-            except CalledProcessError:
-                print(f"Could not copypac '{package_name}'\n", flush=True)
-                print(format_exc(), flush=True)
-                sys.exit(1)
+        if package_name is not None:
+            yield package_name
 
 
 def get_diff(src, dst, pkgname) -> str:
-    result = run(
-        ["osc", "rdiff", dst, pkgname, src], check=True, stdout=PIPE, stderr=PIPE
-    )
+    with tracing.span("osc", "rdiff"):
+        result = run(
+            ["osc", "rdiff", dst, pkgname, src], check=True, stdout=PIPE, stderr=PIPE
+        )
     return result.stdout.decode("utf-8")
 
 
 def get_subprojects(client, project_name) -> list:
     prefix = project_name + ":"
-    root = client.search.project("starts-with(@name,'" + prefix + "')")
+    with tracing.span("osctiny", "search:project", project=project_name):
+        root = client.search.project("starts-with(@name,'" + prefix + "')")
     return [p.attrib["name"] for p in root.findall("project")]
 
 
 def get_project_config(client, project_name) -> str:
+    from osctiny.extensions.projects import Project
+
     project_handler = Project(client)
-    return project_handler.get_config(project_name)
+    with tracing.span("osctiny", "projects:get_config", project=project_name):
+        return project_handler.get_config(project_name)
 
 
 def set_project_config(client, prj, config):
+    from osctiny.extensions.projects import Project
+
     project_handler = Project(client)
-    project_handler.set_config(prj, config=config)
+    with tracing.span("osctiny", "projects:set_config", project=prj):
+        project_handler.set_config(prj, config=config)
 
 
 def has_link(client, project, package) -> bool:
+    from osctiny.extensions.packages import Package
+
     pkg_handler = Package(client)
-    pkg_files = pkg_handler.get_files(project, package)
+    with tracing.span("osctiny", "packages:get_files", project=project, package=package):
+        pkg_files = pkg_handler.get_files(project, package)
     linkinfo = pkg_files.find("linkinfo")
     return linkinfo is not None
 
 
-if __name__ == "__main__":
+def main():
     parser = ArgumentParser()
     parser.add_argument("-s", "--source", dest="src", help="Source Project")
     parser.add_argument("-t", "--target", dest="dst", help="Target Project")
@@ -107,6 +132,10 @@ if __name__ == "__main__":
     parser.add_argument(
         "--exclude-subproject", dest="exclude_subproject", action="append", metavar="SUBPROJECT_TO_EXCLUDE"
     )
+    parser.add_argument(
+        "--catalog", dest="catalog", metavar="FILE",
+        help="Use the projects and packages from a catalog file instead of querying OBS",
+    )
 
     commands = parser.add_subparsers(dest="action", title='Available actions')
     commands.required = True
@@ -117,19 +146,26 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    from osctiny import Osc
+
     osc = Osc(url=args.url)
 
     BASE_SRC = args.src
     BASE_DST = args.dst
     exclude = args.exclude_packages
     exclude_subprojects = args.exclude_subproject if args.exclude_subproject is not None else []
+    index = catalog.load_catalog(args.catalog) if args.catalog else None
 
     if args.action in ["packages", "all"]:
-        copy_packages(osc, BASE_SRC, BASE_DST, exclude_packages=exclude)
+        copy_packages(osc, BASE_SRC, BASE_DST, exclude_packages=exclude, index=index)
 
     if args.action in ["subprojects", "projectconfigs", "all"]:
-        subprojects_src = get_subprojects(osc, BASE_SRC)
-        subprojects_dst = get_subprojects(osc, BASE_DST)
+        if index is not None:
+            subprojects_src = catalog.get_subprojects(index, args.url, BASE_SRC)
+            subprojects_dst = catalog.get_subprojects(index, args.url, BASE_DST)
+        else:
+            subprojects_src = get_subprojects(osc, BASE_SRC)
+            subprojects_dst = get_subprojects(osc, BASE_DST)
 
         for subproject_src in subprojects_src:
             if subproject_src in exclude_subprojects:
@@ -139,7 +175,7 @@ if __name__ == "__main__":
             subproject_dst = BASE_DST + ":" + sp_name
             if subproject_dst in subprojects_dst:
                 if args.action in ["subprojects", "all"]:
-                    copy_packages(osc, BASE_SRC, BASE_DST, sp_name, exclude)
+                    copy_packages(osc, BASE_SRC, BASE_DST, sp_name, exclude, index)
 
                 if args.action in ["projectconfigs", "all"]:
                     cfg_src = get_project_config(osc, subproject_src)
@@ -162,3 +198,8 @@ if __name__ == "__main__":
                     set_project_config(osc, BASE_DST + ":" + sp_name, cfg_src)
             else:
                 print(f"The project '{subproject_dst}' does not exist.\n", flush=True)
+
+
+if __name__ == "__main__":
+    with tracing.span("run", "promote_packages", argv=" ".join(sys.argv[1:])):
+        main()
@@ -10,9 +10,11 @@ in the same repository (or different repository)
 import os
 import subprocess
 import sys
-import tempfile
 
+import catalog
 import scmutils
+import tracing
+import workspace
 
 SOURCE_GIT_SERVER = "src.opensuse.org"
 SOURCE_GIT_ORG = "saltbundle"
@@ -25,13 +27,13 @@ TARGET_BRANCH = "bundle"
 TARGET_REPO_TOKEN = os.environ.get("GITEA_TOKEN", "PUT-YOUR-ACCESS-TOKEN-HERE")
 AUTH_HEADERS = {"Authorization": f"Bearer {TARGET_REPO_TOKEN}"}
 
-REPOS_TO_EXCLUDE = ["_ObsPrj", ".profile"]
+CATALOG_FILE = os.environ.get("CATALOG_FILE")
 
 
-stats = {"processed": 0, "promoted": [], "to_promote": [], "errors": []}
-for repo in scmutils.get_repo_list(
-    git_server=SOURCE_GIT_SERVER, org=SOURCE_GIT_ORG, exclude=REPOS_TO_EXCLUDE
-):
+def promote_repo(repo: str, stats: dict, pool: workspace.WorkspacePool):
+    """
+    Promote SOURCE_BRANCH to TARGET_BRANCH for a repository if they differ
+    """
     print(f"Processing package https://{SOURCE_GIT_SERVER}/{SOURCE_GIT_ORG}/{repo} ...")
     stats["processed"] += 1
 
@@ -53,14 +55,14 @@ for repo in scmutils.get_repo_list(
     except Exception:
         print("---> ERROR: cannot get commit hash. Check configured access token!")
         stats["errors"].append(repo)
-        continue
+        return
 
     if source_hash != target_hash:
         print(f"---> YAY!!! We need to promote '{SOURCE_BRANCH}' branch here!")
         print("---> Here is the diff:\n")
         stats["to_promote"].append(repo)
         try:
-            with tempfile.TemporaryDirectory() as tmpdir:
+            with pool.workspace() as tmpdir:
                 try:
                     scmutils.promote_package(
                         git_server=SOURCE_GIT_SERVER,
@@ -78,12 +80,12 @@ for repo in scmutils.get_repo_list(
                     print(f"   STDERR: {exc.stderr}")
                     stats["errors"].append(repo)
                     print()
-                    continue
+                    return
         except Exception as exc:
             print(f"---> ERROR: {exc}")
             stats["errors"].append(repo)
             print()
-            continue
+            return
         print(
             f"---> Promoted '{SOURCE_BRANCH}' branch from https://{SOURCE_GIT_SERVER}/{SOURCE_GIT_ORG} to branch '{TARGET_BRANCH}' at https://{TARGET_GIT_SERVER}/{TARGET_GIT_ORG}"
         )
@@ -92,57 +94,84 @@ for repo in scmutils.get_repo_list(
         print("---> Nothing to promote here.")
     print()
 
-print("----------------------------------------------------------------")
-try:
-    with tempfile.TemporaryDirectory() as tmpdir:
-        try:
-            print(
-                f"Promoting possible changes in Project Configs (_config) at https://{SOURCE_GIT_SERVER}/{SOURCE_GIT_ORG}/_ObsPrj ..."
-            )
-            if scmutils.promote_project_config(
-                git_server=SOURCE_GIT_SERVER,
-                org=SOURCE_GIT_ORG,
-                source_branch=SOURCE_BRANCH,
-                target_branch=TARGET_BRANCH,
-                auth_token=TARGET_REPO_TOKEN,
-                cwd=tmpdir,
-            ):
-                print("---> Successfully promoted!")
-            else:
-                print("---> Nothing to promote here.")
-        except subprocess.CalledProcessError as exc:
-            print("---> ERROR: promoting project configs!")
-            print(f"   Git Command failed: {exc.cmd}")
-            print(f"   STDOUT: {exc.stdout}")
-            print(f"   STDERR: {exc.stderr}")
-            stats["errors"].append("_ObsPrj/_config")
-except Exception as exc:
-    print(f"---> ERROR: {exc}")
-    stats["errors"].append("_ObsPrj/_config")
-
-print()
-print("----------------------------------------------------------------")
-print(f" Total packages processed: {stats['processed']}")
-print(" Packages that required to be promoted: ", end="")
-if not stats["to_promote"]:
-    print("(none)")
-else:
-    print(len(stats["to_promote"]))
-print(" Packages that were successfully promoted: ", end="")
-if not stats["promoted"]:
-    print("(none)")
-else:
-    print(len(stats["promoted"]))
-    for pkg in stats["promoted"]:
-        print(f" * {pkg}")
-print(" Packages with errors: ", end="")
-if not stats["errors"]:
-    print("(none)")
-else:
-    print(len(stats["errors"]))
-    for pkg in stats["errors"]:
-        print(f" * ERROR {pkg}")
-print("----------------------------------------------------------------")
-
-if stats["errors"]:
-    sys.exit(1)
+
+def promote_project_configs(stats: dict, pool: workspace.WorkspacePool):
+    """
+    Promote the Project Configs (_config) from SOURCE_BRANCH to TARGET_BRANCH
+    """
+    try:
+        with pool.workspace() as tmpdir:
+            try:
+                print(
+                    f"Promoting possible changes in Project Configs (_config) at https://{SOURCE_GIT_SERVER}/{SOURCE_GIT_ORG}/_ObsPrj ..."
+                )
+                if scmutils.promote_project_config(
+                    git_server=SOURCE_GIT_SERVER,
+                    org=SOURCE_GIT_ORG,
+                    source_branch=SOURCE_BRANCH,
+                    target_branch=TARGET_BRANCH,
+                    auth_token=TARGET_REPO_TOKEN,
+                    cwd=tmpdir,
+                ):
+                    print("---> Successfully promoted!")
+                else:
+                    print("---> Nothing to promote here.")
+            except subprocess.CalledProcessError as exc:
+                print("---> ERROR: promoting project configs!")
+                print(f"   Git Command failed: {exc.cmd}")
+                print(f"   STDOUT: {exc.stdout}")
+                print(f"   STDERR: {exc.stderr}")
+                stats["errors"].append("_ObsPrj/_config")
+    except Exception as exc:
+        print(f"---> ERROR: {exc}")
+        stats["errors"].append("_ObsPrj/_config")
+
+
+def print_summary(stats: dict):
+    print("----------------------------------------------------------------")
+    print(f" Total packages processed: {stats['processed']}")
+    print(" Packages that required to be promoted: ", end="")
+    if not stats["to_promote"]:
+        print("(none)")
+    else:
+        print(len(stats["to_promote"]))
+    print(" Packages that were successfully promoted: ", end="")
+    if not stats["promoted"]:
+        print("(none)")
+    else:
+        print(len(stats["promoted"]))
+        for pkg in stats["promoted"]:
+            print(f" * {pkg}")
+    print(" Packages with errors: ", end="")
+    if not stats["errors"]:
+        print("(none)")
+    else:
+        print(len(stats["errors"]))
+        for pkg in stats["errors"]:
+            print(f" * ERROR {pkg}")
+    print("----------------------------------------------------------------")
+
+
+def main():
+    stats = {"processed": 0, "promoted": [], "to_promote": [], "errors": []}
+    with workspace.WorkspacePool() as pool:
+        for repo in catalog.get_repo_list(
+            git_server=SOURCE_GIT_SERVER, org=SOURCE_GIT_ORG, catalog_file=CATALOG_FILE
+        ):
+            with tracing.span("repo", "promote", repo=repo):
+                promote_repo(repo, stats, pool)
+
+        print("----------------------------------------------------------------")
+        with tracing.span("repo", "promote", repo="_ObsPrj"):
+            promote_project_configs(stats, pool)
+
+    print()
+    print_summary(stats)
+
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with tracing.span("run", "promote_salt_bundle_scm"):
+        main()
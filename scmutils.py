@@ -7,21 +7,26 @@ Git repositories and perform some operations
 import subprocess
 from typing import Dict, List
 
-import requests
+import tracing
+
+REPOS_TO_EXCLUDE = ["_ObsPrj", ".profile"]
 
 
 def fetch_repos_json(git_server: str, org: str) -> str:
     """
     Use gitea API to fetch the list of repositories for a given organization.
     """
+    import requests
+
     output = []
     keep_fetching = True
     page = 1
 
     while keep_fetching:
-        ret = requests.get(
-            f"https://{git_server}/api/v1/users/{org}/repos?limit=100&page={page}"
-        ).json()
+        with tracing.span("http", "gitea:repos", server=git_server, org=org, page=page):
+            ret = requests.get(
+                f"https://{git_server}/api/v1/users/{org}/repos?limit=100&page={page}"
+            ).json()
         if not ret:
             # Empty pages are []
             keep_fetching = False
@@ -42,11 +47,16 @@ def get_commit_hash(
     """
     Get latest commit hash for a given branch name
     """
+    import requests
+
     ret = None
-    ret = requests.get(
-        f"https://{git_server}/api/v1/repos/{org}/{repo_name}/branches/{branch}",
-        headers=headers,
-    ).json()["commit"]["id"]
+    with tracing.span(
+        "http", "gitea:branch", server=git_server, repo=f"{org}/{repo_name}", branch=branch
+    ):
+        ret = requests.get(
+            f"https://{git_server}/api/v1/repos/{org}/{repo_name}/branches/{branch}",
+            headers=headers,
+        ).json()["commit"]["id"]
     return ret
 
 
@@ -55,15 +65,17 @@ def run_git(command: str, cwd: str = None, check: bool = True):
     Run a git command
     """
     _cmd = f"git {command}"
-    result = subprocess.run(
-        _cmd,
-        shell=True,
-        check=check,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True,
-        cwd=cwd,
-    )
+    # Only the subcommand is traced, as the arguments may contain tokens
+    with tracing.span("git", command.split()[0]):
+        result = subprocess.run(
+            _cmd,
+            shell=True,
+            check=check,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            cwd=cwd,
+        )
     return result
 
 
@@ -30,7 +30,18 @@ GIT_BRANCH="$4"
 COMMIT_AUTHOR="Salt Jenkins Automation <salt-ci@suse.de>"
 
 # Setup and Cleanup
-WORKSPACE=$(mktemp -d -t obs_sync_XXXXXX)
+# Use SCRATCH_DIR if set, otherwise /dev/shm (RAM-backed) when writable
+# and with enough free space, see workspace.py
+if [ -z "$SCRATCH_DIR" ]; then
+    SCRATCH_MIN_FREE=$(( ${SCRATCH_MAX_BYTES:-2147483648} + ${SCRATCH_HEADROOM_BYTES:-1073741824} ))
+    if [ -w /dev/shm ] && [ "$(stat -f -c %T /dev/shm)" = "tmpfs" ] \
+        && [ "$(df --output=avail -B1 /dev/shm | tail -n 1)" -ge "$SCRATCH_MIN_FREE" ]; then
+        SCRATCH_DIR=/dev/shm
+    else
+        SCRATCH_DIR="${TMPDIR:-/tmp}"
+    fi
+fi
+WORKSPACE=$(mktemp -d -p "$SCRATCH_DIR" obs_sync_XXXXXX)
 trap 'rm -rf "$WORKSPACE"' EXIT
 echo "Created temporary workspace at $WORKSPACE"
 
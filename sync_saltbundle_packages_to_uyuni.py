@@ -16,9 +16,11 @@ with the following permissions:
 import os
 import subprocess
 import sys
-import tempfile
 
+import catalog
 import scmutils
+import tracing
+import workspace
 
 SOURCE_GIT_SERVER = "src.opensuse.org"
 SOURCE_GIT_ORG = "saltbundle"
@@ -31,13 +33,13 @@ TARGET_BRANCHES = ["uyunitools-main"]
 TARGET_REPO_TOKEN = os.environ.get("GITEA_TOKEN", "PUT-YOUR-ACCESS-TOKEN-HERE")
 AUTH_HEADERS = {"Authorization": f"Bearer {TARGET_REPO_TOKEN}"}
 
-REPOS_TO_EXCLUDE = ["_ObsPrj", ".profile"]
+CATALOG_FILE = os.environ.get("CATALOG_FILE")
 
 
-stats = {"processed": 0, "synced": [], "to_sync": [], "errors": []}
-for repo in scmutils.get_repo_list(
-    git_server=SOURCE_GIT_SERVER, org=SOURCE_GIT_ORG, exclude=REPOS_TO_EXCLUDE
-):
+def sync_repo(repo: str, stats: dict, pool: workspace.WorkspacePool):
+    """
+    Push SOURCE_BRANCH to TARGET_BRANCHES for a repository if any of them differ
+    """
     print(f"Processing package https://{SOURCE_GIT_SERVER}/{SOURCE_GIT_ORG}/{repo} ...")
     stats["processed"] += 1
     force_sync = False
@@ -66,7 +68,7 @@ for repo in scmutils.get_repo_list(
         print("---> ERROR: cannot get commit hash. Check configured access token!")
         print()
         stats["errors"].append(repo)
-        continue
+        return
 
     if force_sync:
         print(
@@ -74,7 +76,7 @@ for repo in scmutils.get_repo_list(
         )
         stats["to_sync"].append(repo)
         try:
-            with tempfile.TemporaryDirectory() as tmpdir:
+            with pool.workspace() as tmpdir:
                 try:
                     scmutils.sync_branches_for_repo(
                         source_git_server=SOURCE_GIT_SERVER,
@@ -94,12 +96,12 @@ for repo in scmutils.get_repo_list(
                     print(f"   STDERR: {exc.stderr}")
                     stats["errors"].append(repo)
                     print()
-                    continue
+                    return
         except Exception as exc:
             print(f"---> ERROR: {exc}")
             stats["errors"].append(repo)
             print()
-            continue
+            return
         print(
             f"---> Pushed branch '{SOURCE_BRANCH}' from {SOURCE_GIT_SERVER} to branches '{TARGET_BRANCHES}' at {TARGET_GIT_SERVER}"
         )
@@ -108,28 +110,47 @@ for repo in scmutils.get_repo_list(
         print("---> Nothing to sync here.")
     print()
 
-print("----------------------------------------------------------------")
-print(f" Total packages processed: {stats['processed']}")
-print(" Packages that required a sync: ", end="")
-if not stats["to_sync"]:
-    print("(none)")
-else:
-    print(len(stats["to_sync"]))
-print(" Packages that were successfully synced: ", end="")
-if not stats["synced"]:
-    print("(none)")
-else:
-    print(len(stats["synced"]))
-    for pkg in stats["synced"]:
-        print(f" * {pkg}")
-print(" Packages with errors: ", end="")
-if not stats["errors"]:
-    print("(none)")
-else:
-    print(len(stats["errors"]))
-    for pkg in stats["errors"]:
-        print(f" * ERROR {pkg}")
-print("----------------------------------------------------------------")
-
-if stats["errors"]:
-    sys.exit(1)
+
+def print_summary(stats: dict):
+    print("----------------------------------------------------------------")
+    print(f" Total packages processed: {stats['processed']}")
+    print(" Packages that required a sync: ", end="")
+    if not stats["to_sync"]:
+        print("(none)")
+    else:
+        print(len(stats["to_sync"]))
+    print(" Packages that were successfully synced: ", end="")
+    if not stats["synced"]:
+        print("(none)")
+    else:
+        print(len(stats["synced"]))
+        for pkg in stats["synced"]:
+            print(f" * {pkg}")
+    print(" Packages with errors: ", end="")
+    if not stats["errors"]:
+        print("(none)")
+    else:
+        print(len(stats["errors"]))
+        for pkg in stats["errors"]:
+            print(f" * ERROR {pkg}")
+    print("----------------------------------------------------------------")
+
+
+def main():
+    stats = {"processed": 0, "synced": [], "to_sync": [], "errors": []}
+    with workspace.WorkspacePool() as pool:
+        for repo in catalog.get_repo_list(
+            git_server=SOURCE_GIT_SERVER, org=SOURCE_GIT_ORG, catalog_file=CATALOG_FILE
+        ):
+            with tracing.span("repo", "sync", repo=repo):
+                sync_repo(repo, stats, pool)
+
+    print_summary(stats)
+
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with tracing.span("run", "sync_saltbundle_packages_to_uyuni"):
+        main()
@@ -0,0 +1,105 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import catalog
+
+APIURL = "https://api.example.org"
+PROJECTS = [
+    "bundle",
+    "bundle:debbuild",
+    "bundle:testing",
+    "bundle:testing:debbuild",
+    "bundle:testing:SLE_15",
+    "bundle:testing:SLE_15:Update",
+]
+
+
+class FakeOsc:
+    """
+    OBS client whose project search matches "starts-with" queries on PROJECTS
+    """
+
+    url = APIURL
+
+    def __init__(self):
+        self.search = SimpleNamespace(project=self._search_project)
+
+    @staticmethod
+    def _search_project(query):
+        prefixes = [part.split("'")[1] for part in query.split(" or ")]
+        found = [
+            SimpleNamespace(attrib={"name": name})
+            for name in PROJECTS
+            if any(name.startswith(prefix) for prefix in prefixes)
+        ]
+        return SimpleNamespace(findall=lambda tag: found)
+
+
+def fake_list_packages(client, project):
+    return {
+        f"{project}-pkg": {"link": False},
+        f"{project}-linked": {"link": True},
+    }
+
+
+@mock.patch("catalog.list_packages", side_effect=fake_list_packages)
+class TestAddObsProjects(unittest.TestCase):
+    def build(self):
+        index = catalog.new_catalog()
+        osc = FakeOsc()
+        catalog.add_obs_projects(
+            index, osc, ["bundle:testing"],
+            exclude_subprojects=["bundle:testing:debbuild"],
+        )
+        catalog.add_obs_projects(index, osc, ["bundle"], with_packages=False)
+        return index
+
+    def test_shallow_project_keeps_deep_entries(self, list_packages):
+        index = self.build()
+
+        self.assertEqual(
+            catalog.get_packages(index, APIURL, "bundle:testing:debbuild"),
+            ["bundle:testing:debbuild-pkg"],
+        )
+        self.assertEqual(
+            catalog.get_subprojects(index, APIURL, "bundle:testing"),
+            ["bundle:testing:SLE_15", "bundle:testing:SLE_15:Update"],
+        )
+        # Packages are listed once per project of the deep pass only
+        self.assertEqual(list_packages.call_count, 4)
+
+    def test_only_direct_children_are_stored(self, list_packages):
+        obs = self.build()["obs"][APIURL]
+
+        self.assertEqual(
+            obs["bundle"]["subprojects"], ["bundle:debbuild", "bundle:testing"]
+        )
+        self.assertEqual(
+            obs["bundle:testing"]["subprojects"],
+            ["bundle:testing:SLE_15", "bundle:testing:debbuild"],
+        )
+        self.assertEqual(
+            obs["bundle:testing:SLE_15"]["subprojects"],
+            ["bundle:testing:SLE_15:Update"],
+        )
+        self.assertIsNone(obs["bundle:debbuild"]["packages"])
+
+    def test_shallow_project_subprojects(self, list_packages):
+        index = self.build()
+
+        self.assertEqual(
+            catalog.get_subprojects(index, APIURL, "bundle"),
+            [
+                "bundle:debbuild",
+                "bundle:testing",
+                "bundle:testing:SLE_15",
+                "bundle:testing:SLE_15:Update",
+            ],
+        )
+        with self.assertRaises(Exception):
+            catalog.get_packages(index, APIURL, "bundle:debbuild")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+import preflight
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = ""):
+        self.status_code = status_code
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """
+    Session returning the same response for every request
+    """
+
+    def __init__(self, response: FakeResponse):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self.response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def ls_remote(returncode: int):
+    return mock.patch(
+        "preflight.scmutils.run_git",
+        return_value=subprocess.CompletedProcess([], returncode, "", "fatal: error"),
+    )
+
+
+def session(status_code: int = 200, text: str = ""):
+    return mock.patch(
+        "preflight.get_session",
+        return_value=FakeSession(FakeResponse(status_code, text)),
+    )
+
+
+class TestGetChecks(unittest.TestCase):
+    def test_groups(self):
+        self.assertEqual(
+            list(preflight.get_checks("4.3.7", groups=["branches"])),
+            ["salt-mu-branch", "salt-packaging-mu-branch"],
+        )
+        self.assertEqual(
+            list(preflight.get_checks("4.3.7", groups=["services"])),
+            ["testing-service", "testing-debian-service"],
+        )
+        self.assertEqual(len(preflight.get_checks("4.3.7", "3006.0")), 5)
+
+
+class TestRunChecks(unittest.TestCase):
+    def run_branches(self):
+        return preflight.run_checks(preflight.get_checks("4.3.7", groups=["branches"]))
+
+    def test_branch_present(self):
+        with session(), ls_remote(0):
+            report = self.run_branches()
+        self.assertTrue(all(e["passed"] and not e["error"] for e in report))
+
+    def test_branch_absent(self):
+        with session(), ls_remote(2):
+            report = self.run_branches()
+        self.assertTrue(all(not e["passed"] and not e["error"] for e in report))
+
+    def test_branch_lookup_error(self):
+        with session(), ls_remote(128):
+            report = self.run_branches()
+        self.assertTrue(all(not e["passed"] and e["error"] for e in report))
+
+    def test_service_checks(self):
+        service = '<param name="revision">MU/4.3.7</param> salt_3006.0.orig.tar.gz'
+        with session(text=service):
+            report = preflight.run_checks(
+                preflight.get_checks("4.3.7", "3006.0", groups=["services"])
+            )
+        passed = {e["check"]: e["passed"] for e in report}
+        self.assertEqual(
+            passed,
+            {
+                "testing-service": False,
+                "testing-debian-service": False,
+                "testing-debian-orig-tarball": True,
+            },
+        )
+        self.assertFalse(any(e["error"] for e in report))
+
+    def test_service_http_errors(self):
+        for status_code in (403, 503):
+            with self.subTest(status_code=status_code):
+                with session(status_code):
+                    report = preflight.run_checks(
+                        preflight.get_checks("4.3.7", groups=["services"])
+                    )
+                self.assertTrue(all(e["error"] for e in report))
+
+
+class TestMain(unittest.TestCase):
+    def run_main(self, *args) -> int:
+        argv = ["preflight.py", "--mu-version", "4.3.7", "--check", "branches", *args]
+        with mock.patch("sys.argv", argv), mock.patch("builtins.print"):
+            with self.assertRaises(SystemExit) as ctx:
+                preflight.main()
+                raise SystemExit(0)
+        return ctx.exception.code
+
+    def test_exit_status(self):
+        cases = [(0, 0), (2, preflight.EXIT_FAILED), (128, preflight.EXIT_ERROR)]
+        for returncode, expected in cases:
+            with self.subTest(returncode=returncode):
+                with session(), ls_remote(returncode):
+                    self.assertEqual(self.run_main(), expected)
+
+    def test_report_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "preflight.json")
+            with session(), ls_remote(2):
+                self.assertEqual(self.run_main("--report", path), preflight.EXIT_FAILED)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(len(report), 2)
+
+    def test_unexpected_error(self):
+        with session(), ls_remote(0):
+            self.assertEqual(
+                self.run_main("--report", "/nonexistent/preflight.json"),
+                preflight.EXIT_ERROR,
+            )
+        with mock.patch("preflight.get_session", side_effect=ImportError("requests")):
+            self.assertEqual(self.run_main(), preflight.EXIT_ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
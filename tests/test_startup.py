@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "catalog",
+    "preflight",
+    "promote_packages",
+    "promote_salt_bundle_scm",
+    "sync_saltbundle_packages_to_galaxy",
+    "sync_saltbundle_packages_to_uyuni",
+    "tracing",
+]
+# Entry points with a command line parser, whose --help does no work
+CLI_ENTRY_POINTS = ["catalog", "preflight", "promote_packages", "tracing"]
+HEAVY_MODULES = ["requests", "osctiny", "lxml"]
+
+# Importing an entry point must not take longer than this (in seconds)
+IMPORT_BUDGET = 0.3
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"duration": duration, "heavy": heavy}}))
+"""
+
+
+def probe_import(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter and report its import time
+    and the heavy modules it loaded
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_DIR,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return json.loads(result.stdout)
+
+
+class TestStartup(unittest.TestCase):
+    def test_entry_points_import_lazily(self):
+        for module in ENTRY_POINTS:
+            with self.subTest(module=module):
+                result = probe_import(module)
+                self.assertEqual(result["heavy"], [])
+                self.assertLess(result["duration"], IMPORT_BUDGET)
+
+    def test_help_does_not_load_heavy_modules(self):
+        for module in CLI_ENTRY_POINTS:
+            with self.subTest(module=module):
+                result = subprocess.run(
+                    [sys.executable, "-X", "importtime", f"{module}.py", "--help"],
+                    cwd=REPO_DIR,
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    universal_newlines=True,
+                )
+                imported = [
+                    line.rsplit("|", 1)[-1].strip()
+                    for line in result.stderr.splitlines()
+                ]
+                for heavy in HEAVY_MODULES:
+                    self.assertNotIn(heavy, imported)
+
+
+if __name__ == "__main__":
+    unittest.main()
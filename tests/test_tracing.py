@@ -0,0 +1,165 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from types import ModuleType, SimpleNamespace
+from unittest import mock
+
+import preflight
+import promote_packages
+import tracing
+from tests.test_preflight import FakeResponse, FakeSession
+
+
+def make_span(span_id, parent, kind, endpoint, start, duration):
+    return {
+        "trace": "t",
+        "id": span_id,
+        "parent": parent,
+        "kind": kind,
+        "endpoint": endpoint,
+        "attrs": {},
+        "start": start,
+        "duration": duration,
+        "error": None,
+    }
+
+
+class TracedTestCase(unittest.TestCase):
+    """
+    Write the spans of each test to a temporary trace file
+    """
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.trace_file = os.path.join(tmpdir.name, "trace.jsonl")
+        patcher = mock.patch("tracing.TRACE_FILE", self.trace_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self):
+        spans = tracing.load_spans(self.trace_file)
+        return spans, {sp["id"]: sp for sp in spans}
+
+
+class TestSpan(TracedTestCase):
+    def test_nesting(self):
+        with tracing.span("run", "test"):
+            with tracing.span("package", "copy", package="a"):
+                with tracing.span("osc", "rdiff"):
+                    pass
+            with self.assertRaises(ValueError):
+                with tracing.span("http", "fail"):
+                    raise ValueError("boom")
+
+        spans, by_id = self.load()
+        parents = {
+            sp["endpoint"]: by_id[sp["parent"]]["endpoint"] if sp["parent"] else None
+            for sp in spans
+        }
+        self.assertEqual(
+            parents, {"test": None, "copy": "test", "rdiff": "copy", "fail": "test"}
+        )
+        self.assertEqual(spans[2]["error"], "ValueError: boom")
+
+    def test_nesting_across_preflight_threads(self):
+        session = FakeSession(FakeResponse(200))
+        with mock.patch("preflight.get_session", return_value=session):
+            with tracing.span("run", "preflight"):
+                preflight.run_checks(preflight.get_checks("4.3.7", groups=["services"]))
+
+        spans, by_id = self.load()
+        run = [sp for sp in spans if sp["kind"] == "run"][0]
+        http = [sp for sp in spans if sp["kind"] == "http"]
+        self.assertEqual(len(http), 2)
+        self.assertTrue(all(sp["parent"] == run["id"] for sp in http))
+
+    def test_link_checks_nested_under_packages(self):
+        listing = SimpleNamespace(
+            iter=lambda: [SimpleNamespace(attrib={"name": n}) for n in ("a", "b")]
+        )
+        package_handler = mock.Mock()
+        package_handler.get_list.return_value = listing
+        package_handler.get_files.return_value.find.return_value = None
+        fake_module = ModuleType("osctiny.extensions.packages")
+        fake_module.Package = mock.Mock(return_value=package_handler)
+        modules = {
+            "osctiny": ModuleType("osctiny"),
+            "osctiny.extensions": ModuleType("osctiny.extensions"),
+            "osctiny.extensions.packages": fake_module,
+        }
+        diff = subprocess.CompletedProcess([], 0, stdout=b"")
+        client = SimpleNamespace(url="https://api.example.org")
+
+        with mock.patch.dict(sys.modules, modules), mock.patch(
+            "promote_packages.run", return_value=diff
+        ), mock.patch("builtins.print"):
+            with tracing.span("run", "promote_packages"):
+                promote_packages.copy_packages(client, "src", "dst")
+
+        spans, by_id = self.load()
+        get_files = [sp for sp in spans if sp["endpoint"] == "packages:get_files"]
+        self.assertEqual(len(get_files), 2)
+        for sp in get_files:
+            parent = by_id[sp["parent"]]
+            self.assertEqual(parent["kind"], "package")
+            self.assertEqual(parent["attrs"]["package"], sp["attrs"]["package"])
+
+    def test_disabled(self):
+        with mock.patch("tracing.TRACE_FILE", None):
+            with tracing.span("run", "test"):
+                pass
+        self.assertFalse(os.path.exists(self.trace_file))
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(v) for v in range(10, 0, -1)]
+        self.assertEqual(tracing.percentile(values, 50), 5.0)
+        self.assertEqual(tracing.percentile(values, 95), 10.0)
+        self.assertEqual(tracing.percentile([3.0], 95), 3.0)
+
+    def test_critical_path_sequential(self):
+        spans = [
+            make_span("r", None, "run", "x", 0.0, 0.020),
+            make_span("a", "r", "package", "copy", 0.0, 0.011),
+            make_span("d", "a", "osc", "rdiff", 0.0, 0.010),
+            make_span("y", "r", "http", "y", 0.012, 0.001),
+        ]
+        path = [(depth, sp["id"]) for depth, sp in tracing.get_critical_path(spans)]
+        self.assertEqual(path, [(0, "r"), (1, "a"), (2, "d"), (1, "y")])
+
+    def test_critical_path_concurrent(self):
+        spans = [
+            make_span("r", None, "run", "preflight", 0.0, 0.5),
+            make_span("fast", "r", "http", "a", 0.0, 0.1),
+            make_span("slow", "r", "http", "b", 0.0, 0.4),
+            make_span("next", "r", "http", "c", 0.45, 0.05),
+        ]
+        path = [sp["id"] for _, sp in tracing.get_critical_path(spans)]
+        self.assertEqual(path, ["r", "slow", "next"])
+
+    def test_endpoint_stats_split_containers(self):
+        spans = [
+            make_span("r", None, "run", "x", 0.0, 1.0),
+            make_span("a", "r", "package", "copy", 0.0, 0.6),
+            make_span("b", "a", "git", "fetch", 0.0, 0.5),
+            make_span("c", "r", "git", "fetch", 0.6, 0.3),
+        ]
+        calls = tracing.get_endpoint_stats(spans)
+        self.assertEqual(
+            [(s["kind"], s["endpoint"], s["count"]) for s in calls],
+            [("git", "fetch", 2)],
+        )
+        self.assertEqual(calls[0]["p95"], 0.5)
+        containers = tracing.get_endpoint_stats(spans, containers=True)
+        self.assertEqual(
+            [(s["kind"], s["endpoint"]) for s in containers],
+            [("run", "x"), ("package", "copy")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
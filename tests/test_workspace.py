@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import workspace
+
+
+class TestGetScratchDir(unittest.TestCase):
+    @mock.patch("workspace.SCRATCH_DIR", None)
+    @mock.patch("workspace.is_tmpfs", return_value=True)
+    @mock.patch("workspace.os.access", return_value=True)
+    def test_small_tmpfs_is_not_used(self, access, is_tmpfs):
+        with mock.patch("workspace.get_free_bytes", return_value=64 * 1024**2):
+            self.assertEqual(
+                workspace.get_scratch_dir(max_bytes=1024**3), tempfile.gettempdir()
+            )
+        with mock.patch("workspace.get_free_bytes", return_value=8 * 1024**3):
+            self.assertEqual(
+                workspace.get_scratch_dir(max_bytes=1024**3), workspace.SHM_DIR
+            )
+
+    @mock.patch("workspace.SCRATCH_DIR", "/scratch")
+    def test_scratch_dir_wins(self):
+        self.assertEqual(workspace.get_scratch_dir(), "/scratch")
+
+
+class TestWorkspacePool(unittest.TestCase):
+    def test_workspaces_are_emptied_and_recycled(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            with workspace.WorkspacePool(base_dir=base_dir, max_bytes=1) as pool:
+                with pool.workspace() as first:
+                    with open(os.path.join(first, "file"), "w") as f:
+                        f.write("content")
+                with pool.workspace() as second:
+                    self.assertEqual(second, first)
+                    self.assertEqual(os.listdir(second), [])
+                root = pool.root
+            self.assertFalse(os.path.exists(root))
+
+    def test_release_error_keeps_caller_exception(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            with workspace.WorkspacePool(base_dir=base_dir) as pool:
+                with mock.patch("workspace.os.rename", side_effect=OSError("busy")):
+                    with self.assertRaises(ValueError):
+                        with pool.workspace() as path:
+                            with open(os.path.join(path, "file"), "w") as f:
+                                f.write("content")
+                            raise ValueError("original error")
+                self.assertFalse(os.path.exists(path))
+                with pool.workspace() as other:
+                    self.assertNotEqual(other, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""
+This script records and summarizes traces of the promotion scripts.
+
+When the TRACE_FILE environment variable is set, every traced operation
+(HTTP request, osctiny call, git or osc command, ...) is written as a
+JSON line ("span") to that file when it finishes. Spans are nested, so
+each git or HTTP call is attached to the package or repository that
+was being processed. Without TRACE_FILE, tracing does nothing.
+
+The "report" command summarizes a trace file: critical path, duration
+percentiles per endpoint and the slowest calls.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+TRACE_FILE = os.environ.get("TRACE_FILE")
+
+# Spans grouping other spans, reported apart from the calls they contain
+CONTAINER_KINDS = ["run", "package", "repo"]
+
+_trace_id = uuid.uuid4().hex
+_current_span: ContextVar = ContextVar("current_span", default=None)
+_lock = threading.Lock()
+
+
+def _write(record: Dict):
+    line = json.dumps(record, sort_keys=True)
+    with _lock:
+        with open(TRACE_FILE, "a") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def span(kind: str, endpoint: str, **attrs):
+    """
+    Trace the enclosed block as a span of the given kind ("http", "osc",
+    "git", ...) and endpoint, nested into the current span.
+    """
+    if not TRACE_FILE:
+        yield
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.time()
+    begin = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        duration = time.perf_counter() - begin
+        _current_span.reset(token)
+        _write(
+            {
+                "trace": _trace_id,
+                "id": span_id,
+                "parent": parent,
+                "kind": kind,
+                "endpoint": endpoint,
+                "attrs": attrs,
+                "start": start,
+                "duration": duration,
+                "error": error,
+            }
+        )
+
+
+def load_spans(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Returns the given percentile (nearest-rank) of a list of values
+    """
+    values = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def _end(sp: Dict) -> float:
+    return sp["start"] + sp["duration"]
+
+
+def _critical_children(nested: List[Dict]) -> List[Dict]:
+    """
+    Returns the chain of child spans that determines when their parent ends:
+    the child that finishes last, then the child that finished before it
+    started, and so on. Sequential children are therefore all included,
+    while only the longest of the concurrent ones is.
+    """
+    chain = []
+    last = max(nested, key=_end)
+    while last is not None:
+        chain.append(last)
+        before = [sp for sp in nested if _end(sp) <= last["start"]]
+        last = max(before, key=_end) if before else None
+    return list(reversed(chain))
+
+
+def get_critical_path(spans: List[Dict]) -> List[Tuple[int, Dict]]:
+    """
+    Returns the critical path of the longest root span as (depth, span) items
+    """
+    children = {}
+    for sp in spans:
+        children.setdefault((sp["trace"], sp["parent"]), []).append(sp)
+    roots = [sp for sp in spans if sp["parent"] is None]
+    if not roots:
+        return []
+
+    path = []
+    pending = [(0, max(roots, key=lambda sp: sp["duration"]))]
+    while pending:
+        depth, current = pending.pop()
+        path.append((depth, current))
+        nested = children.get((current["trace"], current["id"]))
+        if nested:
+            chain = _critical_children(nested)
+            pending.extend((depth + 1, sp) for sp in reversed(chain))
+    return path
+
+
+def get_endpoint_stats(spans: List[Dict], containers: bool = False) -> List[Dict]:
+    """
+    Returns count, total, p50 and p95 durations per kind and endpoint, either
+    for the calls (HTTP, osctiny, git, osc, ...) or for the container spans
+    """
+    durations = {}
+    for sp in spans:
+        if (sp["kind"] in CONTAINER_KINDS) == containers:
+            durations.setdefault((sp["kind"], sp["endpoint"]), []).append(sp["duration"])
+    stats = [
+        {
+            "kind": kind,
+            "endpoint": endpoint,
+            "count": len(values),
+            "total": sum(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+        }
+        for (kind, endpoint), values in durations.items()
+    ]
+    return sorted(stats, key=lambda s: s["total"], reverse=True)
+
+
+def format_span(sp: Dict) -> str:
+    attrs = " ".join(f"{k}={v}" for k, v in sorted(sp["attrs"].items()))
+    error = " ERROR" if sp["error"] else ""
+    return f"{sp['duration']:9.3f}s  {sp['kind']}:{sp['endpoint']} {attrs}{error}"
+
+
+def print_report(spans: List[Dict], top: int = 10):
+    print("----------------------------------------------------------------")
+    print(f" Spans: {len(spans)}")
+    print("----------------------------------------------------------------")
+    print(" Critical path:")
+    for depth, sp in get_critical_path(spans):
+        print(f" {'  ' * depth}{format_span(sp)}")
+    print("----------------------------------------------------------------")
+    for title, containers in (("Endpoints", False), ("Runs, packages and repositories", True)):
+        print(f" {title}:")
+        print(f" {'count':>6} {'total':>10} {'p50':>9} {'p95':>9}  endpoint")
+        for s in get_endpoint_stats(spans, containers):
+            print(
+                f" {s['count']:6d} {s['total']:9.3f}s {s['p50']:8.3f}s {s['p95']:8.3f}s  {s['kind']}:{s['endpoint']}"
+            )
+        print("----------------------------------------------------------------")
+    print(f" Top {top} slowest calls:")
+    calls = [sp for sp in spans if sp["kind"] not in CONTAINER_KINDS]
+    for sp in sorted(calls, key=lambda sp: sp["duration"], reverse=True)[:top]:
+        print(f" {format_span(sp)}")
+    print("----------------------------------------------------------------")
+
+
+def main():
+    parser = ArgumentParser()
+    commands = parser.add_subparsers(dest="action", title="Available actions")
+    commands.required = True
+    report = commands.add_parser("report", help="Summarize a trace file")
+    report.add_argument("trace_file", metavar="TRACE_FILE")
+    report.add_argument(
+        "--top", dest="top", type=int, default=10,
+        help="Number of slowest calls to show. (Default: 10)",
+    )
+    args = parser.parse_args()
+
+    if args.action == "report":
+        print_report(load_spans(args.trace_file), top=args.top)
+
+
+if __name__ == "__main__":
+    main()
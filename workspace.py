@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+"""
+This file contains a pool of scratch directories ("workspaces") used
+to run git and osc operations.
+
+- Workspaces are placed in SCRATCH_DIR if set, otherwise in /dev/shm
+  when it is a writable tmpfs with enough free space (SCRATCH_MAX_BYTES
+  plus SCRATCH_HEADROOM_BYTES), otherwise in the default temporary directory.
+- Workspaces are emptied and recycled after use instead of being created
+  and deleted for every repository.
+- A released workspace is renamed aside and deleted by a background thread.
+  If the pool uses more than SCRATCH_MAX_BYTES of the scratch filesystem
+  (estimated from the filesystem usage), releasing a workspace waits for
+  the pending deletions to finish.
+"""
+
+import itertools
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import List
+
+SCRATCH_DIR = os.environ.get("SCRATCH_DIR")
+SCRATCH_MAX_BYTES = int(os.environ.get("SCRATCH_MAX_BYTES", 2 * 1024**3))
+SCRATCH_HEADROOM_BYTES = int(os.environ.get("SCRATCH_HEADROOM_BYTES", 1024**3))
+SHM_DIR = "/dev/shm"
+
+
+def is_tmpfs(path: str) -> bool:
+    """
+    Check whether a path is on a RAM-backed (tmpfs) filesystem
+    """
+    path = os.path.realpath(path)
+    fstype = None
+    mountpoint = ""
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                fields = line.split()
+                mnt = fields[1]
+                if path != mnt and not path.startswith(mnt.rstrip("/") + "/"):
+                    continue
+                if len(mnt) >= len(mountpoint):
+                    mountpoint, fstype = mnt, fields[2]
+    except OSError:
+        return False
+    return fstype == "tmpfs"
+
+
+def get_free_bytes(path: str) -> int:
+    """
+    Returns the bytes available to unprivileged users on the filesystem of a path
+    """
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
+
+
+def get_scratch_dir(max_bytes: int = SCRATCH_MAX_BYTES) -> str:
+    """
+    Returns the directory where workspaces are created
+    """
+    if SCRATCH_DIR:
+        return SCRATCH_DIR
+    # /dev/shm is RAM: only use it when it can hold all the bytes
+    # the pool may use, plus some headroom
+    if (
+        os.access(SHM_DIR, os.W_OK)
+        and is_tmpfs(SHM_DIR)
+        and get_free_bytes(SHM_DIR) >= max_bytes + SCRATCH_HEADROOM_BYTES
+    ):
+        return SHM_DIR
+    return tempfile.gettempdir()
+
+
+def get_used_bytes(path: str) -> int:
+    """
+    Returns the bytes used on the filesystem of a path
+    """
+    stat = os.statvfs(path)
+    return (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+
+
+class WorkspacePool:
+    """
+    Pool of recycled scratch directories with asynchronous cleanup
+    """
+
+    def __init__(
+        self,
+        base_dir: str = None,
+        max_bytes: int = SCRATCH_MAX_BYTES,
+        prefix: str = "salt-promote-",
+    ):
+        if base_dir is None:
+            base_dir = get_scratch_dir(max_bytes)
+        self.root = tempfile.mkdtemp(prefix=prefix, dir=base_dir)
+        self.max_bytes = max_bytes
+        self._base_used_bytes = get_used_bytes(self.root)
+        self._trash_ids = itertools.count()
+        self._free: List[str] = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._cleaner = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def workspace(self):
+        """
+        Provide an empty workspace, and recycle it afterwards
+        """
+        path = self._acquire()
+        try:
+            yield path
+        finally:
+            self._release(path)
+
+    def _acquire(self) -> str:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return tempfile.mkdtemp(prefix="ws-", dir=self.root)
+
+    def get_pool_bytes(self) -> int:
+        """
+        Estimate the bytes used by the workspaces in use and waiting to be
+        deleted, as the growth of the filesystem usage since the pool was created
+        """
+        return get_used_bytes(self.root) - self._base_used_bytes
+
+    def _release(self, path: str):
+        try:
+            if not os.listdir(path):
+                with self._lock:
+                    self._free.append(path)
+                return
+            trash = os.path.join(self.root, f"trash-{next(self._trash_ids)}")
+            os.rename(path, trash)
+        except OSError:
+            # The workspace is not usable anymore, so it is not recycled.
+            # Errors are not raised to keep the caller's exception, if any.
+            shutil.rmtree(path, ignore_errors=True)
+            return
+
+        self._start_cleaner()
+        self._queue.put(trash)
+        if self.get_pool_bytes() > self.max_bytes:
+            self._queue.join()
+
+        try:
+            os.mkdir(path)
+        except OSError:
+            return
+        with self._lock:
+            self._free.append(path)
+
+    def _start_cleaner(self):
+        with self._lock:
+            if self._cleaner is None:
+                self._cleaner = threading.Thread(target=self._clean, daemon=True)
+                self._cleaner.start()
+
+    def _clean(self):
+        while True:
+            trash = self._queue.get()
+            if trash is None:
+                self._queue.task_done()
+                return
+            shutil.rmtree(trash, ignore_errors=True)
+            self._queue.task_done()
+
+    def close(self):
+        """
+        Wait for pending cleanups and remove all the workspaces
+        """
+        if self._cleaner is not None:
+            self._queue.put(None)
+            self._cleaner.join()
+            self._cleaner = None
+        shutil.rmtree(self.root, ignore_errors=True)